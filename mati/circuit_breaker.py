@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Optional
+
+from .exc import CircuitOpenError
+from .types import SerializableEnum
+
+
+class CircuitState(SerializableEnum):
+    closed = 'closed'
+    open = 'open'
+    half_open = 'half-open'
+
+
+StateListener = Callable[[str, CircuitState, CircuitState], None]
+
+
+@dataclass(frozen=True)
+class CircuitBreakerSettings:
+    """
+    A call counts as failed when it raises a connection error or timeout,
+    gets a 429/5xx response, or takes longer than `slow_call_duration`.
+    """
+
+    failure_rate_threshold: float = 0.5
+    slow_call_duration: float = 10.0  # seconds
+    window_size: int = 20  # most recent calls considered
+    minimum_calls: int = 10  # before the failure rate is evaluated
+    recovery_timeout: float = 30.0  # seconds spent open before probing
+    half_open_max_calls: int = 1  # probes needed to close again
+    on_state_change: Optional[StateListener] = None
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of calls to one endpoint family. All state changes
+    happen under a lock that is never held across I/O, so a breaker can be
+    shared by threads and by coroutines running calls in an executor.
+    """
+
+    def __init__(self, endpoint: str, settings: CircuitBreakerSettings):
+        self.endpoint = endpoint
+        self.settings = settings
+        self._lock = threading.RLock()  # listeners may read the state
+        self._state = CircuitState.closed
+        self._window: Deque[bool] = deque(maxlen=settings.window_size)
+        self._opened_at = 0.0
+        self._generation = 0  # bumped on every state change
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state is CircuitState.open and not self._retry_after():
+                self._transition(CircuitState.half_open)
+            return self._state
+
+    @property
+    def failure_rate(self) -> float:
+        with self._lock:
+            if not self._window:
+                return 0.0
+            return self._window.count(False) / len(self._window)
+
+    def acquire(self) -> int:
+        """
+        Raises CircuitOpenError if the call shouldn't go through. Otherwise
+        returns the generation to pass to `record()` with the outcome.
+        """
+        with self._lock:
+            if self._state is CircuitState.open:
+                retry_after = self._retry_after()
+                if retry_after:
+                    raise CircuitOpenError(self.endpoint, retry_after)
+                self._transition(CircuitState.half_open)
+            if self._state is CircuitState.half_open:
+                if self._probes_in_flight >= self.settings.half_open_max_calls:
+                    raise CircuitOpenError(self.endpoint, 0.0)
+                self._probes_in_flight += 1
+            return self._generation
+
+    def record(
+        self, generation: int, success: Optional[bool], duration: float
+    ) -> None:
+        """
+        `success` is None when the call was interrupted without an outcome,
+        which only frees its probe slot
+        """
+        ok = success and duration < self.settings.slow_call_duration
+        with self._lock:
+            if generation != self._generation:
+                return  # admitted before the last state change
+            if self._state is CircuitState.half_open:
+                self._probes_in_flight -= 1
+                if success is None:
+                    return
+                if not ok:
+                    self._transition(CircuitState.open)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.settings.half_open_max_calls:
+                    self._transition(CircuitState.closed)
+            elif success is not None:  # closed
+                self._window.append(bool(ok))
+                if (
+                    len(self._window) >= self.settings.minimum_calls
+                    and self._window.count(False) / len(self._window)
+                    >= self.settings.failure_rate_threshold
+                ):
+                    self._transition(CircuitState.open)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._transition(CircuitState.closed)
+
+    def _retry_after(self) -> float:
+        elapsed = time.monotonic() - self._opened_at
+        return max(self.settings.recovery_timeout - elapsed, 0.0)
+
+    def _transition(self, new_state: CircuitState) -> None:
+        old_state = self._state
+        self._state = new_state
+        self._generation += 1
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if new_state is CircuitState.open:
+            self._opened_at = time.monotonic()
+        elif new_state is CircuitState.closed:
+            self._window.clear()
+        listener = self.settings.on_state_change
+        if listener and old_state is not new_state:
+            listener(self.endpoint, old_state, new_state)
@@ -1,8 +1,21 @@
 import os
-from typing import Any, ClassVar, Dict, Optional, Tuple, Union
+import re
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy, deepcopy
+from functools import partial
+from typing import Any, ClassVar, Dict, Iterable, Optional, Set, Tuple, Union
 
 from requests import Response, Session
+from requests.exceptions import ConnectionError, Timeout
 
+from .circuit_breaker import CircuitBreaker, CircuitBreakerSettings
+from .coalescing import RequestCoalescer
+from .deadline import Deadline
+from .exc import DeadlineExceeded
+from .idempotency import IdempotencyIndex
+from .media import CHUNK_SIZE, DOWNLOAD_TIMEOUT, MediaCache
 from .resources import (
     AccessToken,
     Identity,
@@ -10,18 +23,30 @@ from .resources import (
     UserValidationData,
     Verification,
 )
+from .token_pool import TokenPool, TokenPoolSettings
 from .version import __version__ as client_version
 
 API_URL = 'https://api.getmati.com'
 
+# clients alive in this process, so they can be reset after a fork
+_clients: 'weakref.WeakSet[Client]' = weakref.WeakSet()
+
 
 class Client:
 
     base_url: ClassVar[str] = API_URL
     basic_auth_creds: Tuple[str, str]
     bearer_tokens: Dict[Union[None, str], AccessToken]
+    circuit_breaker_settings: Optional[CircuitBreakerSettings]
+    circuit_breakers: Dict[str, CircuitBreaker]
+    coalesce_requests: bool
+    coalescer: RequestCoalescer
     headers: Dict[str, str]
+    idempotency_index: Optional[IdempotencyIndex]
+    media_cache: Optional[MediaCache]
     session: Session
+    token_pool: Optional[TokenPool]
+    token_pool_settings: Optional[TokenPoolSettings]
 
     # resources
     access_tokens: ClassVar = AccessToken
@@ -30,30 +55,110 @@ class Client:
     verifications: ClassVar = Verification
 
     def __init__(
-        self, api_key: Optional[str] = None, secret_key: Optional[str] = None
+        self,
+        api_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        circuit_breaker: Optional[CircuitBreakerSettings] = None,
+        media_cache: Optional[MediaCache] = None,
+        coalesce_requests: bool = False,
+        idempotency_index: Optional[IdempotencyIndex] = None,
+        token_pool: Optional[TokenPoolSettings] = None,
     ):
-        self.session = Session()
         self.headers = {'User-Agent': f'mati-python/{client_version}'}
         api_key = api_key or os.environ['MATI_API_KEY']
         secret_key = secret_key or os.environ['MATI_SECRET_KEY']
         self.basic_auth_creds = (api_key, secret_key)
         self.bearer_tokens = {}
+        self.circuit_breaker_settings = circuit_breaker
+        self.media_cache = media_cache
+        self.coalesce_requests = coalesce_requests
+        self.idempotency_index = idempotency_index
+        self.token_pool_settings = token_pool
+        self._init_process_state()
         Resource._client = self
 
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        # connections and locks can't be shared with another process
+        del state['session']
+        del state['circuit_breakers']
+        del state['coalescer']
+        del state['token_pool']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_process_state(start_pool=False)
+        if not hasattr(Resource, '_client'):  # fresh worker process
+            Resource._client = self
+
+    def _init_process_state(self, start_pool: bool = True) -> None:
+        """
+        Creates the state that belongs to a single process: the connection
+        pool and anything guarded by a lock. Bearer tokens are kept.
+
+        Without `start_pool`, the token pool's thread is only started once
+        a token is needed, so forked or unpickled copies that never make a
+        request don't run one.
+        """
+        self.session = Session()
+        self.circuit_breakers = {}
+        self.coalescer = RequestCoalescer()
+        _clients.add(self)
+        # threads don't survive a fork, so each process runs its own pool
+        self.token_pool = None
+        if self.token_pool_settings:
+            self.token_pool = TokenPool(self, self.token_pool_settings)
+            # copies made by unpickling are often short-lived
+            weakref.finalize(self, self.token_pool.stop)
+            if start_pool:
+                self.token_pool.start()
+
+    def close(self) -> None:
+        """Stops the token pool and closes pooled connections"""
+        if self.token_pool:
+            self.token_pool.stop()
+        self.session.close()
+
+    def _reset_after_fork(self) -> None:
+        # the parent's sockets are left alone, they're still in use there
+        cache = self.media_cache
+        if cache:
+            self.media_cache = MediaCache(cache.directory, cache.max_size)
+        if self.idempotency_index:  # copies get a fresh lock
+            self.idempotency_index = copy(self.idempotency_index)
+        self._init_process_state(start_pool=False)
+
     def get_valid_bearer_token(
-        self, score: Optional[str] = None
+        self, score: Optional[str] = None, deadline: Optional[Deadline] = None
     ) -> AccessToken:
+        if self.token_pool:
+            self.token_pool.start()  # copies start it lazily
         try:
             expired = self.bearer_tokens[score].expired
         except KeyError:
             expired = True
-        if expired:  # renew token
-            self.bearer_tokens[score] = self.access_tokens.create(
-                score, client=self
-            )
+        if expired:
+            return self.renew_bearer_token(score, deadline)
         return self.bearer_tokens[score]
 
+    def renew_bearer_token(
+        self, score: Optional[str] = None, deadline: Optional[Deadline] = None
+    ) -> AccessToken:
+        def renew(shared: Deadline) -> AccessToken:
+            token = self.access_tokens.create(
+                score, client=self, deadline=shared
+            )
+            self.bearer_tokens[score] = token
+            return token
+
+        # concurrent renewals of a score share a single OAuth request, which
+        # runs until the last of their deadlines
+        return self.coalescer.call(('token', score), renew, deadline)
+
     def get(self, endpoint: str, **kwargs: Any) -> Dict[str, Any]:
+        if self.coalesce_requests:
+            return self._coalesced_get(endpoint, **kwargs)
         return self.request('get', endpoint, **kwargs)
 
     def post(self, endpoint: str, **kwargs: Any) -> Dict[str, Any]:
@@ -65,17 +170,172 @@ class Client:
         endpoint: str,
         auth: Union[str, AccessToken, None] = None,
         token_score: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
         **kwargs: Any,
     ) -> Dict[str, Any]:
         url = self.base_url + endpoint
-        auth = auth or self.get_valid_bearer_token(token_score)
-        headers = {**self.headers, **dict(Authorization=str(auth))}
-        response = self.session.request(method, url, headers=headers, **kwargs)
+        auth = auth or self.get_valid_bearer_token(token_score, deadline)
+        headers = {
+            **self.headers,
+            **kwargs.pop('headers', {}),
+            **dict(Authorization=str(auth)),
+        }
+        if deadline:
+            kwargs['timeout'] = deadline.timeout(kwargs.get('timeout'))
+        breaker = self.get_circuit_breaker(endpoint)
+        try:
+            if breaker is None:
+                response = self.session.request(
+                    method, url, headers=headers, **kwargs
+                )
+            else:
+                response = self._guarded_request(
+                    breaker, deadline, method, url, headers=headers, **kwargs
+                )
+        except Timeout as exc:
+            if deadline and deadline.expired:
+                raise DeadlineExceeded(deadline.cancelled) from exc
+            raise
         self._check_response(response)
         return response.json()
 
+    def _coalesced_get(
+        self,
+        endpoint: str,
+        deadline: Optional[Deadline] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        key = (endpoint, repr(sorted(kwargs.items())))
+
+        def request(shared: Deadline) -> Dict[str, Any]:
+            return self.request('get', endpoint, deadline=shared, **kwargs)
+
+        resp = self.coalescer.call(key, request, deadline)
+        # every caller gets its own copy, resources modify the response
+        return deepcopy(resp)
+
+    def fetch_media(
+        self,
+        urls: Iterable[str],
+        max_workers: int = 4,
+        timeout: float = DOWNLOAD_TIMEOUT,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, str]:
+        """
+        Downloads photo/video URLs concurrently into the media cache and
+        returns the local path for each URL. Cached media isn't downloaded
+        again, and none of the returned paths is evicted by this call, even
+        when the batch is larger than the cache.
+
+        `timeout` bounds connecting and each read of every download, and is
+        further capped by the remaining `deadline` budget.
+        """
+        if self.media_cache is None:
+            self.media_cache = MediaCache()
+        cache = self.media_cache
+        urls = list(dict.fromkeys(urls))  # drop duplicates, keep order
+        with cache.batch() as batch:
+            fetch = partial(
+                self._fetch_media_file, cache, batch, timeout, deadline
+            )
+            with ThreadPoolExecutor(max_workers) as executor:
+                return dict(zip(urls, executor.map(fetch, urls)))
+
+    def _fetch_media_file(
+        self,
+        cache: MediaCache,
+        batch: Set[str],
+        timeout: float,
+        deadline: Optional[Deadline],
+        url: str,
+    ) -> str:
+        path = cache.get(url, batch)
+        if path:
+            return path
+        if deadline:
+            deadline.check()
+            timeout = min(timeout, deadline.remaining)
+        try:
+            with self.session.get(
+                url, headers=self.headers, stream=True, timeout=timeout
+            ) as resp:
+                self._check_response(resp)
+                return cache.put(url, resp.iter_content(CHUNK_SIZE), batch)
+        except (Timeout, ConnectionError) as exc:
+            # streaming reads past the timeout surface as ConnectionError
+            if deadline and deadline.expired:
+                raise DeadlineExceeded(deadline.cancelled) from exc
+            raise
+
+    def _guarded_request(
+        self,
+        breaker: CircuitBreaker,
+        deadline: Optional[Deadline],
+        method: str,
+        url: str,
+        **kwargs: Any,
+    ) -> Response:
+        generation = breaker.acquire()
+        start = time.monotonic()
+        success: Optional[bool] = None  # stays None if interrupted
+        try:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except Timeout:
+                # cut short by the caller's own deadline, not an outage
+                if not (deadline and deadline.expired):
+                    success = False
+                raise
+            except Exception:
+                success = False
+                raise
+            # 4xx other than 429 are the caller's fault, not an outage
+            status = response.status_code
+            success = status < 500 and status != 429
+        finally:
+            breaker.record(generation, success, time.monotonic() - start)
+        return response
+
+    def get_circuit_breaker(self, endpoint: str) -> Optional[CircuitBreaker]:
+        if self.circuit_breaker_settings is None:
+            return None
+        family = self._endpoint_family(endpoint)
+        try:
+            return self.circuit_breakers[family]
+        except KeyError:
+            # setdefault keeps a single breaker if two threads race here
+            return self.circuit_breakers.setdefault(
+                family, CircuitBreaker(family, self.circuit_breaker_settings),
+            )
+
+    def _endpoint_family(self, endpoint: str) -> str:
+        families = sorted(
+            (
+                self.access_tokens._endpoint,
+                self.identities._endpoint,
+                self.user_validation_data._endpoint,
+                self.verifications._endpoint,
+            ),
+            key=len,
+            reverse=True,
+        )
+        for family in families:
+            pattern = re.sub(r'\\{\w+\\}', '[^/]+', re.escape(family))
+            if re.match(f'{pattern}(/|$)', endpoint):
+                return family
+        return endpoint
+
     @staticmethod
     def _check_response(response: Response) -> None:
         if response.ok:
             return
         response.raise_for_status()
+
+
+def _reset_clients_after_fork() -> None:
+    for client in list(_clients):
+        client._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):  # not available on Windows
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
@@ -0,0 +1,104 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+from .deadline import Deadline
+
+T = TypeVar('T')
+
+DEFAULT_TIMEOUT = 30.0  # seconds, budget for callers without a deadline
+POLL_INTERVAL = 0.05  # seconds between checks for a cancelled deadline
+
+
+class _SharedCall:
+    def __init__(self, expires_at: float):
+        self.future: Future = Future()
+        self.deadline = Deadline(0)
+        self.deadline.expires_at = expires_at
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """
+    Lets concurrent identical calls share a single execution: the first
+    caller for a key starts it and every caller waits for its outcome,
+    result or exception. Nothing is kept once the call completes, so later
+    callers always get a fresh result.
+
+    The shared call gets its own deadline, extended to the latest deadline
+    among its callers (`default_timeout` from now for a caller without
+    one), and cancelled once every caller has given up. Each caller only
+    waits until its own deadline, so one caller giving up never fails the
+    others. A first caller without a deadline runs the call itself, one
+    with a deadline hands it to a small pool so it can stop waiting.
+    """
+
+    def __init__(
+        self, default_timeout: float = DEFAULT_TIMEOUT, max_workers: int = 8
+    ):
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, _SharedCall] = {}
+        # threads are only started on the first submit
+        self._executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix='mati-coalesced-call'
+        )
+
+    def call(
+        self,
+        key: Hashable,
+        func: Callable[[Deadline], T],
+        deadline: Optional[Deadline] = None,
+    ) -> T:
+        """`func` gets the shared call's deadline to bound its requests"""
+        if deadline:
+            deadline.check()
+            expires_at = deadline.expires_at
+        else:
+            expires_at = time.monotonic() + self.default_timeout
+        with self._lock:
+            shared = self._in_flight.get(key)
+            leader = shared is None or shared.deadline.cancelled
+            if shared is None or leader:
+                shared = self._in_flight[key] = _SharedCall(expires_at)
+            elif shared.deadline.expires_at < expires_at:
+                shared.deadline.expires_at = expires_at
+            shared.waiters += 1
+        try:
+            if leader and deadline is None:
+                self._run(key, shared, func)
+            elif leader:
+                self._executor.submit(self._run, key, shared, func)
+            return self._wait(shared.future, deadline)
+        finally:
+            with self._lock:
+                shared.waiters -= 1
+                if not shared.waiters and not shared.future.done():
+                    shared.deadline.cancel()  # nobody is waiting anymore
+
+    def _run(
+        self, key: Hashable, shared: _SharedCall, func: Callable[[Deadline], T]
+    ) -> None:
+        try:
+            result = func(shared.deadline)
+        except BaseException as exc:
+            self._complete(key, shared)
+            shared.future.set_exception(exc)
+        else:
+            self._complete(key, shared)
+            shared.future.set_result(result)
+
+    @staticmethod
+    def _wait(future: 'Future[T]', deadline: Optional[Deadline]) -> T:
+        if deadline:
+            while not future.done():
+                deadline.check()
+                wait([future], min(deadline.remaining, POLL_INTERVAL))
+        return future.result()
+
+    def _complete(self, key: Hashable, shared: _SharedCall) -> None:
+        # late arrivals should start a new call instead of joining this one
+        with self._lock:
+            if self._in_flight.get(key) is shared:
+                del self._in_flight[key]
@@ -0,0 +1,51 @@
+import threading
+import time
+from typing import Optional, Tuple, Union
+
+from .exc import DeadlineExceeded
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class Deadline:
+    """
+    Time budget shared by every request of a multi-call operation.
+
+    The remaining budget becomes each request's connect/read timeout, and
+    once it runs out (or `cancel()` is called, from any thread) no further
+    requests are started.
+    """
+
+    def __init__(self, timeout: float):
+        self.expires_at = time.monotonic() + timeout
+        self._cancelled = threading.Event()
+
+    @property
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.cancelled or self.remaining == 0
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def check(self) -> None:
+        if self.expired:
+            raise DeadlineExceeded(self.cancelled)
+
+    def timeout(self, timeout: Optional[Timeout] = None) -> Timeout:
+        """Caps a requests-style timeout to the remaining budget"""
+        self.check()
+        remaining = self.remaining
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return min(connect, remaining), min(read, remaining)
+        return min(timeout, remaining)
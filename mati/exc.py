@@ -0,0 +1,31 @@
+class MatiError(Exception):
+    """Base class for errors raised by the client itself"""
+
+
+class CircuitOpenError(MatiError):
+    """
+    The circuit breaker for an endpoint family is open, so the request was
+    rejected without reaching the API
+    """
+
+    def __init__(self, endpoint: str, retry_after: float):
+        self.endpoint = endpoint
+        self.retry_after = retry_after  # seconds until a probe is allowed
+        super().__init__(endpoint, retry_after)
+
+    def __str__(self) -> str:
+        return (
+            f'circuit open for {self.endpoint}, '
+            f'retry in {self.retry_after:.1f}s'
+        )
+
+
+class DeadlineExceeded(MatiError):
+    """The caller's deadline ran out or was cancelled before completion"""
+
+    def __init__(self, cancelled: bool = False):
+        self.cancelled = cancelled
+        super().__init__(cancelled)
+
+    def __str__(self) -> str:
+        return 'deadline cancelled' if self.cancelled else 'deadline exceeded'
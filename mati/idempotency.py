@@ -0,0 +1,130 @@
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from hashlib import sha256
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+
+Entry = Tuple[float, Dict[str, Any]]  # expires_at, API response
+
+
+def metadata_digest(metadata: Dict[str, Any]) -> str:
+    normalized = json.dumps(
+        metadata, sort_keys=True, separators=(',', ':'), default=str
+    )
+    return sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class IdempotencyIndex(ABC):
+    """
+    Remembers the API response of each create, keyed by a digest of its
+    input, for `ttl` seconds. A repeat create within that window returns
+    the remembered resource instead of creating a duplicate.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def put(self, key: str, resp: Dict[str, Any]) -> None:
+        ...
+
+
+class MemoryIdempotencyIndex(IdempotencyIndex):
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        super().__init__(ttl)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Entry] = {}
+        # (expires_at, key) of every put, so expired entries are found
+        # without scanning; stale ones for replaced keys are skipped
+        self._expirations: List[Tuple[float, str]] = []
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            try:
+                expires_at, resp = self._entries[key]
+            except KeyError:
+                return None
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            return resp
+
+    def put(self, key: str, resp: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            while self._expirations and self._expirations[0][0] < now:
+                expires_at, k = heapq.heappop(self._expirations)
+                entry = self._entries.get(k)
+                if entry and entry[0] == expires_at:
+                    del self._entries[k]
+            self._entries[key] = (now + self.ttl, resp)
+            heapq.heappush(self._expirations, (now + self.ttl, key))
+
+
+class SQLiteIdempotencyIndex(IdempotencyIndex):
+    """
+    Persists across restarts and can be shared by several processes. Each
+    operation opens its own connection, so it's safe to use from threads
+    and after a fork.
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL):
+        super().__init__(ttl)
+        self.path = path
+        with self._connect() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS idempotency ('
+                'key TEXT PRIMARY KEY, resp TEXT NOT NULL, '
+                'expires_at REAL NOT NULL)'
+            )
+            # expired rows are purged on every put
+            db.execute(
+                'CREATE INDEX IF NOT EXISTS idempotency_expires_at '
+                'ON idempotency (expires_at)'
+            )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as db:
+            row = db.execute(
+                'SELECT resp FROM idempotency '
+                'WHERE key = ? AND expires_at >= ?',
+                (key, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, resp: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._connect() as db:
+            db.execute('DELETE FROM idempotency WHERE expires_at < ?', (now,))
+            db.execute(
+                'INSERT OR REPLACE INTO idempotency VALUES (?, ?, ?)',
+                (key, json.dumps(resp), now + self.ttl),
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:  # commits on success, rolls back on error
+                yield db
+        finally:
+            db.close()
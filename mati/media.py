@@ -0,0 +1,167 @@
+import getpass
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024  # bytes
+DOWNLOAD_TIMEOUT = 30.0  # seconds, for connecting and for each read
+
+
+def _sha256(value: str) -> str:
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def _default_directory() -> str:
+    user = os.getuid() if hasattr(os, 'getuid') else getpass.getuser()
+    return os.path.join(tempfile.gettempdir(), f'mati-media-{user}')
+
+
+def _check_private(directory: str) -> None:
+    """
+    Refuses a directory that another user could have created or can read,
+    since it would expose the media or let them plant cache entries
+    """
+    if not hasattr(os, 'getuid'):  # POSIX permissions only
+        return
+    st = os.stat(directory)
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(
+            f'{directory} must be owned by the current user and not '
+            'accessible to others'
+        )
+
+
+class MediaCache:
+    """
+    Size-bounded local store for verification photos and videos.
+
+    Files live under `objects/` named by the SHA-256 of their content, so
+    the same media reached through different URLs is stored once.
+    `refs/` maps the hash of each URL to its content hash. The least
+    recently used objects are evicted once `max_size` bytes is exceeded.
+
+    The media is personal data, so directories are created readable by
+    the owner only. Without an explicit `directory`, a per-user directory
+    under the system temp dir is used and its ownership and permissions
+    are checked.
+    """
+
+    def __init__(
+        self, directory: Optional[str] = None, max_size: int = DEFAULT_MAX_SIZE
+    ):
+        self.directory = directory or _default_directory()
+        self.max_size = max_size
+        self._objects = os.path.join(self.directory, 'objects')
+        self._refs = os.path.join(self.directory, 'refs')
+        for path in (self.directory, self._objects, self._refs):
+            os.makedirs(path, mode=0o700, exist_ok=True)
+        if directory is None:
+            _check_private(self.directory)
+        self._lock = threading.Lock()
+        self._batches: Dict[int, Set[str]] = {}
+        self.size = sum(os.path.getsize(path) for path in self._object_paths())
+
+    def __getstate__(self) -> Tuple[str, int]:
+        return self.directory, self.max_size
+
+    def __setstate__(self, state: Tuple[str, int]) -> None:
+        self.__init__(*state)  # type: ignore
+
+    @contextmanager
+    def batch(self) -> Iterator[Set[str]]:
+        """
+        Paths returned by `get()`/`put()` with this batch aren't evicted
+        until it ends, so a batch larger than `max_size` temporarily takes
+        the cache over its limit. The excess is evicted by later puts.
+        """
+        paths: Set[str] = set()
+        with self._lock:
+            self._batches[id(paths)] = paths
+        try:
+            yield paths
+        finally:
+            with self._lock:
+                del self._batches[id(paths)]
+
+    def get(self, url: str, batch: Optional[Set[str]] = None) -> Optional[str]:
+        """Local path of the media behind `url`, if it's cached"""
+        try:
+            with open(os.path.join(self._refs, _sha256(url))) as ref:
+                path = os.path.join(self._objects, ref.read())
+            with self._lock:
+                os.utime(path)  # mark as recently used
+                if batch is not None:
+                    batch.add(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(
+        self,
+        url: str,
+        chunks: Iterable[bytes],
+        batch: Optional[Set[str]] = None,
+    ) -> str:
+        """Streams `chunks` to disk and returns the cached path"""
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            path = os.path.join(self._objects, digest.hexdigest())
+            with self._lock:
+                if os.path.exists(path):
+                    os.remove(tmp_path)
+                    os.utime(path)
+                else:
+                    os.replace(tmp_path, path)
+                    self.size += os.path.getsize(path)
+                self._write_ref(url, digest.hexdigest())
+                if batch is not None:
+                    batch.add(path)
+                self._evict(keep=path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in self._object_paths():
+                os.remove(path)
+            for name in os.listdir(self._refs):
+                os.remove(os.path.join(self._refs, name))
+            self.size = 0
+
+    def _write_ref(self, url: str, content_hash: str) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'w') as tmp:
+            tmp.write(content_hash)
+        os.replace(tmp_path, os.path.join(self._refs, _sha256(url)))
+
+    def _evict(self, keep: str) -> None:
+        if self.size <= self.max_size:
+            return
+        protected = {keep}.union(*self._batches.values())
+        by_last_use = sorted(self._object_paths(), key=os.path.getmtime)
+        for path in by_last_use:
+            if self.size <= self.max_size:
+                break
+            if path in protected:
+                continue
+            self.size -= os.path.getsize(path)
+            os.remove(path)
+        # refs pointing to evicted objects are treated as misses by get()
+
+    def _object_paths(self) -> List[str]:
+        return [
+            os.path.join(self._objects, name)
+            for name in os.listdir(self._objects)
+        ]
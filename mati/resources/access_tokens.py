@@ -3,6 +3,7 @@ from dataclasses import dataclass
 from typing import ClassVar, Optional
 
 from ..auth import basic_auth_str, bearer_auth_str
+from ..deadline import Deadline
 from .base import Resource
 
 EXPIRATION_BUFFER = 30  # seconds. Gives us a buffer from expires_in
@@ -22,7 +23,12 @@ class AccessToken(Resource):
     user_id: Optional[str]
 
     @classmethod
-    def create(cls, score: Optional[str] = None, client=None) -> 'AccessToken':
+    def create(
+        cls,
+        score: Optional[str] = None,
+        client=None,
+        deadline: Optional[Deadline] = None,
+    ) -> 'AccessToken':
         client = client or cls._client
         data = dict(grant_type='client_credentials')
         endpoint = cls._endpoint
@@ -30,7 +36,10 @@ class AccessToken(Resource):
             data['score'] = score
             endpoint += '/token'
         resp = client.post(
-            endpoint, data=data, auth=basic_auth_str(*client.basic_auth_creds),
+            endpoint,
+            data=data,
+            auth=basic_auth_str(*client.basic_auth_creds),
+            deadline=deadline,
         )
         try:
             expires_in = resp['expiresIn']
@@ -1,7 +1,10 @@
 import datetime as dt
+from copy import deepcopy
 from dataclasses import dataclass, field
-from typing import ClassVar, List, Optional, Union
+from typing import Any, ClassVar, Dict, List, Optional, Union
 
+from ..deadline import Deadline
+from ..idempotency import metadata_digest
 from ..types import UserValidationFile
 from .base import Resource
 from .user_verification_data import UserValidationData
@@ -30,17 +33,72 @@ class Identity(Resource):
     flowId: Optional[str] = None
 
     @classmethod
-    def create(cls, client=None, **metadata) -> 'Identity':
+    def create(
+        cls,
+        client=None,
+        # Optional[Deadline], left untyped like client so that passing
+        # **metadata with any value type still type-checks
+        deadline=None,
+        idempotency_key: Optional[str] = None,
+        **metadata,
+    ) -> 'Identity':
+        """
+        `client`, `deadline` and `idempotency_key` are taken as parameters,
+        so they can't be used as metadata field names.
+
+        If the client has an idempotency index, a create with the same
+        metadata as one made within the index's window returns that
+        identity without calling the API, and concurrent identical creates
+        share a single request. `idempotency_key` defaults to a digest of
+        the metadata, so retries send the same key.
+        """
         client = client or cls._client
-        resp = client.post(cls._endpoint, json=dict(metadata=metadata))
+        index = client.idempotency_index
+        if index is None and idempotency_key is None:
+            resp = client.post(
+                cls._endpoint, json=dict(metadata=metadata), deadline=deadline
+            )
+        else:
+            idempotency_key = idempotency_key or metadata_digest(metadata)
+            # scoped to the account, so a shared index can't mix them up
+            index_key = metadata_digest(
+                dict(
+                    api_key=client.basic_auth_creds[0],
+                    idempotency_key=idempotency_key,
+                    metadata=metadata,
+                )
+            )
+
+            def create(shared: Deadline) -> Dict[str, Any]:
+                resp = index.get(index_key) if index else None
+                if resp is None:
+                    # shared by concurrent callers, so it runs until the
+                    # last of their deadlines
+                    resp = client.post(
+                        cls._endpoint,
+                        json=dict(metadata=metadata),
+                        headers={'Idempotency-Key': idempotency_key},
+                        deadline=shared,
+                    )
+                    if index:
+                        index.put(index_key, resp)
+                return resp
+
+            key = ('post', cls._endpoint, index_key)
+            resp = deepcopy(client.coalescer.call(key, create, deadline))
         resp['id'] = resp.pop('_id')
         return cls(**resp)
 
     @classmethod
-    def retrieve(cls, identity_id: str, client=None) -> 'Identity':
+    def retrieve(
+        cls,
+        identity_id: str,
+        client=None,
+        deadline: Optional[Deadline] = None,
+    ) -> 'Identity':
         client = client or cls._client
         endpoint = f'{cls._endpoint}/{identity_id}'
-        resp = client.get(endpoint)
+        resp = client.get(endpoint, deadline=deadline)
         resp['id'] = resp.pop('_id')
         return cls(**resp)
 
@@ -51,9 +109,12 @@ class Identity(Resource):
             setattr(self, k, v)
 
     def upload_validation_data(
-        self, user_validation_files: List[UserValidationFile], client=None
+        self,
+        user_validation_files: List[UserValidationFile],
+        client=None,
+        deadline: Optional[Deadline] = None,
     ) -> List[dict]:
         client = client or self._client
         return UserValidationData.upload(
-            self.id, user_validation_files, client=client
+            self.id, user_validation_files, client=client, deadline=deadline
         )
@@ -1,6 +1,7 @@
 import json
-from typing import Any, BinaryIO, ClassVar, Dict, List, Tuple
+from typing import Any, BinaryIO, ClassVar, Dict, List, Optional, Tuple
 
+from mati.deadline import Deadline
 from mati.types import UserValidationFile, ValidationInputType
 
 from .base import Resource
@@ -56,6 +57,7 @@ class UserValidationData(Resource):
         identity_id: str,
         user_validation_files: List[UserValidationFile],
         client=None,
+        deadline: Optional[Deadline] = None,
     ) -> List[Dict[str, Any]]:
         endpoint = cls._endpoint.format(identity_id=identity_id)
         files_metadata: List[Dict[str, Any]] = []
@@ -67,5 +69,6 @@ class UserValidationData(Resource):
             endpoint,
             data=dict(inputs=json.dumps(files_metadata)),
             files=files_with_types,
+            deadline=deadline,
         )
         return resp
@@ -2,6 +2,7 @@ import datetime as dt
 from dataclasses import dataclass, field
 from typing import Any, ClassVar, Dict, List, Optional, TypedDict
 
+from ..deadline import Deadline
 from ..types import VerificationDocument, VerificationDocumentStep
 from .base import Resource
 
@@ -22,10 +23,15 @@ class Verification(Resource):
     obfuscatedAt: Optional[dt.datetime] = None
 
     @classmethod
-    def retrieve(cls, verification_id: str, client=None) -> 'Verification':
+    def retrieve(
+        cls,
+        verification_id: str,
+        client=None,
+        deadline: Optional[Deadline] = None,
+    ) -> 'Verification':
         client = client or cls._client
         endpoint = f'{cls._endpoint}/{verification_id}'
-        resp = client.get(endpoint)
+        resp = client.get(endpoint, deadline=deadline)
         docs = []
         for doc in resp['documents']:
             doc['steps'] = [
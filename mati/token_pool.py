@@ -0,0 +1,116 @@
+import heapq
+import itertools
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Set, Tuple
+
+REFRESH_AHEAD = 60.0  # seconds before expiration
+
+
+@dataclass(frozen=True)
+class TokenPoolSettings:
+    scores: Tuple[Optional[str], ...] = (None,)
+    refresh_ahead: float = REFRESH_AHEAD
+    retry_interval: float = 5.0  # seconds between failed refreshes
+
+    def __post_init__(self) -> None:
+        if not self.scores:
+            raise ValueError('scores must include at least one score')
+
+
+class TokenPool:
+    """
+    Keeps a client's bearer tokens for a declared set of scores valid.
+
+    A background thread fetches every missing token concurrently, then
+    refreshes each one `refresh_ahead` seconds before it expires, picking
+    the next due token from a min-heap of refresh times. Requests keep
+    using the current token while its replacement is fetched.
+
+    `ready` is set once every score has a token. Until then, `pending`
+    holds the scores whose fetch hasn't succeeded yet; they're retried
+    every `retry_interval` seconds.
+    """
+
+    def __init__(self, client, settings: TokenPoolSettings):
+        self.settings = settings
+        self.ready = threading.Event()
+        self.pending: Set[Optional[str]] = set(settings.scores)
+        self._lock = threading.Lock()
+        self._client = weakref.ref(client)  # don't keep the client alive
+        self._stopped = threading.Event()
+        self._heap: List[Tuple[float, int, Optional[str]]] = []
+        self._counter: Iterator[int] = itertools.count()  # heap tiebreaker
+        self._thread = threading.Thread(
+            target=self._run, name='mati-token-pool', daemon=True
+        )
+
+    def start(self) -> None:
+        """Starts refreshing tokens, later calls have no effect"""
+        if self._thread.ident is not None:
+            return
+        with self._lock:
+            if self._thread.ident is None and not self._stopped.is_set():
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every score has a token, see `pending` if not"""
+        self.start()
+        return self.ready.wait(timeout)
+
+    def _run(self) -> None:
+        scores = self.settings.scores
+        with ThreadPoolExecutor(len(scores)) as executor:
+            refresh_times = list(executor.map(self._refresh, scores))
+        for refresh_at, score in zip(refresh_times, scores):
+            self._schedule(refresh_at, score)
+        while self._heap:
+            refresh_at, _, score = self._heap[0]
+            if self._stopped.wait(max(refresh_at - time.time(), 0)):
+                return
+            heapq.heappop(self._heap)
+            self._schedule(self._refresh(score), score)
+
+    def _schedule(
+        self, refresh_at: Optional[float], score: Optional[str]
+    ) -> None:
+        if refresh_at is not None:
+            entry = (refresh_at, next(self._counter), score)
+            heapq.heappush(self._heap, entry)
+
+    def _refresh(self, score: Optional[str]) -> Optional[float]:
+        """Renews the token if it's due and returns its next refresh time"""
+        client = self._client()
+        if client is None or self._stopped.is_set():
+            return None  # nothing left to refresh for
+        try:
+            token = client.bearer_tokens[score]
+        except KeyError:
+            token = None
+        now = time.time()
+        retry_at = now + self.settings.retry_interval
+        if token is not None and self._refresh_time(token) > now:
+            self._fetched(score)
+            return self._refresh_time(token)
+        try:
+            token = client.renew_bearer_token(score)
+        except Exception:
+            return retry_at  # the current token, if any, is still used
+        self._fetched(score)
+        # don't spin if tokens live for less than refresh_ahead
+        return max(self._refresh_time(token), retry_at)
+
+    def _fetched(self, score: Optional[str]) -> None:
+        with self._lock:
+            self.pending.discard(score)
+            if not self.pending:
+                self.ready.set()
+
+    def _refresh_time(self, token) -> float:
+        return token.expires_at.timestamp() - self.settings.refresh_ahead
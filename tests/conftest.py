@@ -1,6 +1,8 @@
 import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from json import JSONDecodeError
-from typing import Generator
+from typing import Generator, List, Optional, Set, Tuple
 
 import pytest
 
@@ -10,10 +12,7 @@ VERIFICATION_RESP = {
     'expired': False,
     'identity': {'status': 'verified'},
     'steps': [],
-    'flow': {
-        'id': '5ae1c769ad10273b96fbc2b9',
-        'name': 'Default flow'
-    },
+    'flow': {'id': '5ae1c769ad10273b96fbc2b9', 'name': 'Default flow'},
     'documents': [
         {
             'country': 'MX',
@@ -172,3 +171,85 @@ def identity(client: Client) -> Generator:
         segundo_apellido='Hegel',
         dob='1770-08-27',
     )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the Mati API that records every request"""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse shows
+    server: 'StubServer'
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path in self.server.failing_paths:
+            self._respond({}, 500)
+        elif self.path.startswith('/oauth'):
+            self._respond(dict(access_token='ACCESS_TOKEN', expiresIn=3600))
+        elif self.path == '/v2/identities':
+            with self.server.lock:
+                self.server.idempotency_keys.append(
+                    self.headers.get('Idempotency-Key')
+                )
+                identity_id = f'identity-{len(self.server.requests)}'
+            self._respond(
+                dict(self._identity(identity_id), **json.loads(body))
+            )
+        else:
+            self._respond({}, 404)
+
+    def do_GET(self) -> None:
+        if self.path.startswith('/v2/identities/'):
+            identity_id = self.path.rsplit('/', 1)[-1]
+            self._respond(self._identity(identity_id))
+        else:
+            self._respond({}, 404)
+
+    @staticmethod
+    def _identity(identity_id: str) -> dict:
+        return dict(
+            _id=identity_id,
+            alive=None,
+            status='pending',
+            dateCreated='2020-01-01T00:00:00.000Z',
+            dateUpdated='2020-01-01T00:00:00.000Z',
+        )
+
+    def _respond(self, body: dict, status: int = 200) -> None:
+        with self.server.lock:
+            self.server.requests.append(
+                (self.command, self.path, self.client_address[1])
+            )
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.lock = threading.Lock()
+        self.requests: List[Tuple[str, str, int]] = []  # method, path, port
+        self.idempotency_keys: List[Optional[str]] = []
+        self.failing_paths: Set[str] = set()  # answered with a 500
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+@pytest.fixture
+def stub_server() -> Generator:
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,181 @@
+import time
+
+import pytest
+from requests import Response
+from requests.exceptions import ConnectionError, HTTPError, ReadTimeout
+
+from mati import Client
+from mati.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerSettings,
+    CircuitState,
+)
+from mati.deadline import Deadline
+from mati.exc import CircuitOpenError, DeadlineExceeded
+
+SETTINGS = CircuitBreakerSettings(
+    failure_rate_threshold=0.5,
+    window_size=4,
+    minimum_calls=4,
+    recovery_timeout=0.05,
+)
+
+
+def fake_response(status_code: int) -> Response:
+    response = Response()
+    response.status_code = status_code
+    response._content = b'{}'
+    return response
+
+
+def test_endpoint_families():
+    client = Client('api_key', 'secret_key', circuit_breaker=SETTINGS)
+    family = client._endpoint_family
+    assert family('/oauth') == '/oauth'
+    assert family('/oauth/token') == '/oauth'
+    assert family('/v2/identities') == '/v2/identities'
+    assert family('/v2/identities/123') == '/v2/identities'
+    assert (
+        family('/v2/identities/123/send-input')
+        == '/v2/identities/{identity_id}/send-input'
+    )
+    assert family('/v2/verifications/123') == '/v2/verifications'
+    assert client.get_circuit_breaker('/v2/identities/1') is (
+        client.get_circuit_breaker('/v2/identities/2')
+    )
+
+
+def test_no_circuit_breaker_by_default():
+    client = Client('api_key', 'secret_key')
+    assert client.get_circuit_breaker('/v2/identities') is None
+
+
+def test_breaker_trips_and_recovers(monkeypatch):
+    transitions = []
+    settings = CircuitBreakerSettings(
+        window_size=4,
+        minimum_calls=4,
+        recovery_timeout=0.05,
+        on_state_change=lambda *args: transitions.append(args[1:]),
+    )
+    client = Client('api_key', 'secret_key', circuit_breaker=settings)
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append(url)
+        if len(calls) <= 2:
+            raise ConnectionError('boom')
+        return fake_response(503 if len(calls) <= 4 else 200)
+
+    monkeypatch.setattr(client.session, 'request', request)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            client.get('/v2/verifications/1', auth='Bearer x')
+    for _ in range(2):
+        with pytest.raises(HTTPError):
+            client.get('/v2/verifications/1', auth='Bearer x')
+    breaker = client.circuit_breakers['/v2/verifications']
+    assert breaker.state is CircuitState.open
+    with pytest.raises(CircuitOpenError) as exc_info:
+        client.get('/v2/verifications/1', auth='Bearer x')
+    assert exc_info.value.endpoint == '/v2/verifications'
+    assert len(calls) == 4
+    # other families are unaffected
+    client.get('/v2/identities/1', auth='Bearer x')
+    assert len(calls) == 5
+
+    time.sleep(0.06)
+    client.get('/v2/verifications/1', auth='Bearer x')  # probe
+    assert breaker.state is CircuitState.closed
+    assert transitions == [
+        (CircuitState.closed, CircuitState.open),
+        (CircuitState.open, CircuitState.half_open),
+        (CircuitState.half_open, CircuitState.closed),
+    ]
+
+
+def test_client_errors_do_not_trip(monkeypatch):
+    client = Client('api_key', 'secret_key', circuit_breaker=SETTINGS)
+    monkeypatch.setattr(
+        client.session, 'request', lambda *args, **kw: fake_response(404)
+    )
+    for _ in range(SETTINGS.window_size):
+        with pytest.raises(HTTPError):
+            client.get('/v2/identities/1', auth='Bearer x')
+    breaker = client.circuit_breakers['/v2/identities']
+    assert breaker.state is CircuitState.closed
+    assert breaker.failure_rate == 0
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker(
+        '/v2/identities',
+        CircuitBreakerSettings(
+            slow_call_duration=1.0, window_size=2, minimum_calls=2
+        ),
+    )
+    breaker.record(breaker.acquire(), True, 0.1)
+    breaker.record(breaker.acquire(), True, 2.0)
+    assert breaker.state is CircuitState.open
+
+
+def test_half_open_allows_limited_probes():
+    breaker = CircuitBreaker('/v2/identities', SETTINGS)
+    for _ in range(SETTINGS.minimum_calls):
+        breaker.record(breaker.acquire(), False, 0.0)
+    time.sleep(0.06)
+    probe = breaker.acquire()  # first probe goes through
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    breaker.record(probe, False, 0.0)  # failed probe opens the circuit again
+    assert breaker.state is CircuitState.open
+
+
+def test_late_calls_from_an_earlier_state_are_ignored():
+    breaker = CircuitBreaker('/v2/identities', SETTINGS)
+    slow_call = breaker.acquire()
+    for _ in range(SETTINGS.minimum_calls):
+        breaker.record(breaker.acquire(), False, 0.0)
+    time.sleep(0.06)
+    probe = breaker.acquire()
+    breaker.record(slow_call, True, 0.0)  # admitted while closed
+    assert breaker.state is CircuitState.half_open
+    breaker.record(probe, False, 0.0)
+    assert breaker.state is CircuitState.open
+
+
+def test_interrupted_probe_frees_its_slot(monkeypatch):
+    client = Client('api_key', 'secret_key', circuit_breaker=SETTINGS)
+    breaker = client.get_circuit_breaker('/v2/identities')
+    for _ in range(SETTINGS.minimum_calls):
+        breaker.record(breaker.acquire(), False, 0.0)
+    time.sleep(0.06)
+
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(client.session, 'request', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        client.get('/v2/identities/1', auth='Bearer x')
+    assert breaker.state is CircuitState.half_open
+    monkeypatch.setattr(
+        client.session, 'request', lambda *args, **kw: fake_response(200)
+    )
+    client.get('/v2/identities/1', auth='Bearer x')  # slot is free again
+    assert breaker.state is CircuitState.closed
+
+
+def test_timeouts_from_the_callers_deadline_do_not_trip(monkeypatch):
+    client = Client('api_key', 'secret_key', circuit_breaker=SETTINGS)
+
+    def request(method, url, **kwargs):
+        time.sleep(kwargs['timeout'])
+        raise ReadTimeout()
+
+    monkeypatch.setattr(client.session, 'request', request)
+    for _ in range(SETTINGS.minimum_calls):
+        with pytest.raises(DeadlineExceeded):
+            client.get('/v2/identities/1', auth='x', deadline=Deadline(0.01))
+    breaker = client.circuit_breakers['/v2/identities']
+    assert breaker.state is CircuitState.closed
+    assert breaker.failure_rate == 0
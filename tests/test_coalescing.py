@@ -0,0 +1,169 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from requests.exceptions import ConnectionError
+
+from mati import Client
+from mati.coalescing import RequestCoalescer
+from mati.deadline import Deadline
+from mati.exc import DeadlineExceeded
+
+
+def slow_stub(client: Client, stub_server, delay: float = 0.2) -> list:
+    client.base_url = stub_server.url  # type: ignore
+    session_request = client.session.request
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append(url)
+        time.sleep(delay)
+        return session_request(method, url, **kwargs)
+
+    client.session.request = request  # type: ignore
+    client.get_valid_bearer_token()
+    calls.clear()
+    return calls
+
+
+def test_concurrent_retrieves_share_one_request(stub_server):
+    client = Client('api_key', 'secret_key', coalesce_requests=True)
+    calls = slow_stub(client, stub_server)
+    with ThreadPoolExecutor(5) as executor:
+        identities = list(executor.map(client.identities.retrieve, ['1'] * 5))
+    assert len(calls) == 1
+    assert all(identity == identities[0] for identity in identities)
+    assert identities[0].id == '1'
+
+    # completed calls aren't cached
+    client.identities.retrieve('1')
+    assert len(calls) == 2
+
+
+def test_different_requests_are_not_coalesced(stub_server):
+    client = Client('api_key', 'secret_key', coalesce_requests=True)
+    calls = slow_stub(client, stub_server, delay=0.05)
+    with ThreadPoolExecutor(3) as executor:
+        list(executor.map(client.identities.retrieve, ['1', '2', '3']))
+    assert len(calls) == 3
+
+
+def test_coalescing_is_opt_in(stub_server):
+    client = Client('api_key', 'secret_key')
+    calls = slow_stub(client, stub_server, delay=0.05)
+    with ThreadPoolExecutor(3) as executor:
+        list(executor.map(client.identities.retrieve, ['1'] * 3))
+    assert len(calls) == 3
+
+
+def test_coalescing_from_asyncio(stub_server):
+    client = Client('api_key', 'secret_key', coalesce_requests=True)
+    calls = slow_stub(client, stub_server)
+
+    async def retrieve_many():
+        return await asyncio.gather(
+            *[
+                asyncio.to_thread(client.identities.retrieve, '1')
+                for _ in range(4)
+            ]
+        )
+
+    identities = asyncio.run(retrieve_many())
+    assert len(calls) == 1
+    assert {identity.id for identity in identities} == {'1'}
+
+
+def test_followers_receive_the_leaders_exception():
+    coalescer = RequestCoalescer()
+    started = threading.Event()
+
+    def failing(shared):
+        started.set()
+        time.sleep(0.1)
+        raise ConnectionError('boom')
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(coalescer.call, 'key', failing)
+        started.wait(1)
+        follower = executor.submit(
+            coalescer.call, 'key', lambda shared: 'unused'
+        )
+        for future in (leader, follower):
+            with pytest.raises(ConnectionError):
+                future.result()
+
+
+def test_follower_gives_up_at_its_deadline():
+    coalescer = RequestCoalescer()
+    started = threading.Event()
+
+    def slow(shared):
+        started.set()
+        time.sleep(0.2)
+        return 'done'
+
+    with ThreadPoolExecutor(1) as executor:
+        leader = executor.submit(coalescer.call, 'key', slow)
+        started.wait(1)
+        with pytest.raises(DeadlineExceeded):
+            coalescer.call('key', slow, Deadline(0.01))
+        assert leader.result() == 'done'
+
+
+def test_first_callers_deadline_does_not_fail_others():
+    coalescer = RequestCoalescer()
+    started = threading.Event()
+
+    def slow(shared):
+        started.set()
+        time.sleep(0.2)
+        return 'done'
+
+    with ThreadPoolExecutor(1) as executor:
+        tight = executor.submit(coalescer.call, 'key', slow, Deadline(0.05))
+        started.wait(1)
+        assert coalescer.call('key', slow) == 'done'
+        with pytest.raises(DeadlineExceeded):
+            tight.result()
+
+
+def test_cancelled_caller_stops_waiting():
+    coalescer = RequestCoalescer()
+    deadline = Deadline(10)
+    threading.Timer(0.05, deadline.cancel).start()
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        coalescer.call('key', lambda shared: time.sleep(0.5), deadline)
+    assert exc_info.value.cancelled
+    assert time.monotonic() - start < 0.3
+
+
+def test_shared_call_is_bounded_by_its_callers():
+    coalescer = RequestCoalescer(default_timeout=60)
+    started = threading.Event()
+    shared_deadlines = []
+
+    def slow(shared):
+        shared_deadlines.append(shared)
+        started.set()
+        while not shared.cancelled:
+            time.sleep(0.01)
+        return 'stopped'
+
+    # runs inline for a caller without a deadline, bounded by the default
+    assert 0 < coalescer.call('inline', lambda shared: shared.remaining) <= 60
+
+    first, second = Deadline(0.2), Deadline(0.4)
+    with ThreadPoolExecutor(1) as executor:
+        tight = executor.submit(coalescer.call, 'key', slow, first)
+        started.wait(1)
+        with pytest.raises(DeadlineExceeded):
+            coalescer.call('key', slow, second)
+        with pytest.raises(DeadlineExceeded):
+            tight.result()
+    # extended to the latest deadline and cancelled once everyone left
+    [shared] = shared_deadlines
+    assert shared.expires_at == second.expires_at
+    assert shared.cancelled
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+from requests import Response
+from requests.exceptions import ReadTimeout
+
+from mati import Client
+from mati.deadline import Deadline
+from mati.exc import DeadlineExceeded
+
+
+def test_deadline_timeout():
+    deadline = Deadline(10)
+    assert 9 < deadline.timeout() <= 10
+    assert deadline.timeout(2) == 2
+    connect, read = deadline.timeout((3, 60))
+    assert connect == 3 and 9 < read <= 10
+
+
+def test_cancelled_deadline():
+    deadline = Deadline(10)
+    deadline.cancel()
+    assert deadline.expired
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        deadline.check()
+    assert exc_info.value.cancelled
+
+
+def test_remaining_budget_flows_into_requests(monkeypatch):
+    client = Client('api_key', 'secret_key')
+    timeouts = []
+
+    def request(method, url, **kwargs):
+        timeouts.append(kwargs['timeout'])
+        response = Response()
+        response.status_code = 200
+        response._content = (
+            b'{"access_token": "token", "expiresIn": 3600}'
+            if url.endswith('/oauth')
+            else b'{"_id": "1", "status": "pending", "alive": null, '
+            b'"dateCreated": "2020-01-01T00:00:00Z", '
+            b'"dateUpdated": "2020-01-01T00:00:00Z"}'
+        )
+        time.sleep(0.01)
+        return response
+
+    monkeypatch.setattr(client.session, 'request', request)
+    deadline = Deadline(5)
+    client.identities.create(client=client, deadline=deadline, name='Georg')
+    # both the token and the identity request shared the budget
+    assert len(timeouts) == 2
+    assert 5 >= timeouts[0] > timeouts[1]
+
+
+def test_spent_deadline_stops_requests(monkeypatch):
+    client = Client('api_key', 'secret_key')
+    calls = []
+    monkeypatch.setattr(
+        client.session, 'request', lambda *args, **kw: calls.append(args)
+    )
+    deadline = Deadline(0)
+    with pytest.raises(DeadlineExceeded):
+        client.verifications.retrieve('123', deadline=deadline)
+    assert not calls
+
+
+def test_timeout_after_deadline_raises_deadline_exceeded(monkeypatch):
+    client = Client('api_key', 'secret_key')
+
+    def request(method, url, **kwargs):
+        time.sleep(kwargs['timeout'])
+        raise ReadTimeout()
+
+    monkeypatch.setattr(client.session, 'request', request)
+    with pytest.raises(DeadlineExceeded):
+        client.get('/v2/verifications/1', auth='x', deadline=Deadline(0.01))
@@ -0,0 +1,155 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mati import Client
+from mati.coalescing import DEFAULT_TIMEOUT
+from mati.deadline import Deadline
+from mati.idempotency import (
+    IdempotencyIndex,
+    MemoryIdempotencyIndex,
+    SQLiteIdempotencyIndex,
+    metadata_digest,
+)
+
+METADATA = dict(nombres='Georg Wilhelm', dob='1770-08-27')
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def index(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryIdempotencyIndex(ttl=60)
+    return SQLiteIdempotencyIndex(str(tmp_path / 'idempotency.db'), ttl=60)
+
+
+def stub_client(stub_server, **kwargs) -> Client:
+    client = Client('api_key', 'secret_key', **kwargs)
+    client.base_url = stub_server.url  # type: ignore
+    return client
+
+
+def test_metadata_digest_ignores_key_order():
+    reordered = dict(dob='1770-08-27', nombres='Georg Wilhelm')
+    assert metadata_digest(METADATA) == metadata_digest(reordered)
+    assert metadata_digest(METADATA) != metadata_digest(dict(dob='1770'))
+
+
+def test_repeat_create_returns_existing_identity(stub_server, index):
+    client = stub_client(stub_server, idempotency_index=index)
+    identity = client.identities.create(client=client, **METADATA)
+    again = client.identities.create(client=client, **METADATA)
+    assert again == identity
+    assert identity.metadata == METADATA
+    assert stub_server.idempotency_keys == [metadata_digest(METADATA)]
+
+    other = client.identities.create(client=client, dob='1770-08-28')
+    assert other.id != identity.id
+    assert len(stub_server.idempotency_keys) == 2
+
+
+def test_concurrent_creates_share_one_request(stub_server, index):
+    client = stub_client(stub_server, idempotency_index=index)
+    with ThreadPoolExecutor(4) as executor:
+        futures = [
+            executor.submit(client.identities.create, client, **METADATA)
+            for _ in range(4)
+        ]
+        identities = [future.result() for future in futures]
+    assert len(stub_server.idempotency_keys) == 1
+    assert all(identity == identities[0] for identity in identities)
+
+
+def test_entries_expire(stub_server):
+    index = MemoryIdempotencyIndex(ttl=0.01)
+    client = stub_client(stub_server, idempotency_index=index)
+    client.identities.create(client=client, **METADATA)
+    time.sleep(0.02)
+    client.identities.create(client=client, **METADATA)
+    assert len(stub_server.idempotency_keys) == 2
+
+
+def test_sqlite_index_persists(tmp_path):
+    path = str(tmp_path / 'idempotency.db')
+    SQLiteIdempotencyIndex(path).put('key', dict(_id='123'))
+    assert SQLiteIdempotencyIndex(path).get('key') == dict(_id='123')
+    assert SQLiteIdempotencyIndex(path).get('missing') is None
+
+
+def test_explicit_idempotency_key(stub_server):
+    client = stub_client(stub_server)
+    client.identities.create(client=client, idempotency_key='abc', **METADATA)
+    client.identities.create(client=client, **METADATA)
+    assert stub_server.idempotency_keys == ['abc', None]
+
+
+def test_concurrent_creates_with_different_keys(stub_server, index):
+    client = stub_client(stub_server, idempotency_index=index)
+    with ThreadPoolExecutor(2) as executor:
+        futures = [
+            executor.submit(
+                client.identities.create,
+                client,
+                idempotency_key=key,
+                **METADATA,
+            )
+            for key in ('key-A', 'key-B')
+        ]
+        first, second = [future.result() for future in futures]
+    assert first.id != second.id
+    assert sorted(stub_server.idempotency_keys) == ['key-A', 'key-B']
+
+
+def test_index_is_scoped_to_the_account(stub_server, index):
+    client = stub_client(stub_server, idempotency_index=index)
+    other = stub_client(stub_server, idempotency_index=index)
+    other.basic_auth_creds = ('other_api_key', 'secret_key')
+    identity = client.identities.create(client=client, **METADATA)
+    assert other.identities.create(client=other, **METADATA) != identity
+    assert len(stub_server.idempotency_keys) == 2
+
+
+def test_index_is_abstract():
+    with pytest.raises(TypeError):
+        IdempotencyIndex()  # type: ignore
+
+
+def test_put_purges_expired_entries(tmp_path):
+    memory = MemoryIdempotencyIndex(ttl=0.01)
+    memory.put('old', dict(_id='1'))
+    memory.put('old', dict(_id='2'))  # replaced, its first expiry is stale
+    time.sleep(0.02)
+    memory.put('new', dict(_id='3'))
+    assert list(memory._entries) == ['new']
+    assert [key for _, key in memory._expirations] == ['new']
+
+    path = str(tmp_path / 'idempotency.db')
+    sqlite = SQLiteIdempotencyIndex(path, ttl=0.01)
+    sqlite.put('old', dict(_id='1'))
+    time.sleep(0.02)
+    sqlite.put('new', dict(_id='2'))
+    with sqlite._connect() as db:
+        assert db.execute('SELECT key FROM idempotency').fetchall() == [
+            ('new',)
+        ]
+        plan = db.execute(
+            'EXPLAIN QUERY PLAN DELETE FROM idempotency WHERE expires_at < 0'
+        ).fetchall()
+    assert 'idempotency_expires_at' in str(plan)
+
+
+def test_shared_create_is_bounded(stub_server, index):
+    client = stub_client(stub_server, idempotency_index=index)
+    client.get_valid_bearer_token()
+    session_request = client.session.request
+    timeouts = []
+
+    def request(method, url, **kwargs):
+        timeouts.append(kwargs.get('timeout'))
+        return session_request(method, url, **kwargs)
+
+    client.session.request = request  # type: ignore
+    client.identities.create(client=client, deadline=Deadline(5), **METADATA)
+    client.identities.create(client=client, dob='1770-08-28')
+    assert 0 < timeouts[0] <= 5
+    assert 0 < timeouts[1] <= DEFAULT_TIMEOUT
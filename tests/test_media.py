@@ -0,0 +1,132 @@
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+from requests import Response
+from requests.exceptions import ReadTimeout
+
+from mati import Client
+from mati.deadline import Deadline
+from mati.exc import DeadlineExceeded
+from mati.media import MediaCache
+
+PHOTO_URL = 'https://media.getmati.com/media/xxx'
+VIDEO_URL = 'https://media.getmati.com/media/yyy'
+
+
+class FakeRaw:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def read(self, amt=None, **kwargs):
+        chunk, self.content = self.content[:amt], self.content[amt:]
+        return chunk
+
+
+def mock_media(monkeypatch, client: Client, media: dict) -> list:
+    downloads = []
+    lock = threading.Lock()
+
+    def get(url, **kwargs):
+        assert kwargs['stream']
+        with lock:
+            downloads.append(url)
+        response = Response()
+        response.status_code = 200
+        response.raw = FakeRaw(media[url])
+        return response
+
+    monkeypatch.setattr(client.session, 'get', get)
+    return downloads
+
+
+def test_fetch_media(tmp_path, monkeypatch):
+    cache = MediaCache(str(tmp_path))
+    client = Client('api_key', 'secret_key', media_cache=cache)
+    media = {PHOTO_URL: b'photo' * 100_000, VIDEO_URL: b'video' * 100_000}
+    downloads = mock_media(monkeypatch, client, media)
+
+    paths = client.fetch_media([PHOTO_URL, VIDEO_URL, PHOTO_URL])
+    assert sorted(downloads) == [PHOTO_URL, VIDEO_URL]
+    for url, path in paths.items():
+        with open(path, 'rb') as f:
+            assert f.read() == media[url]
+
+    # repeat views are served from disk
+    assert client.fetch_media([PHOTO_URL, VIDEO_URL]) == paths
+    assert len(downloads) == 2
+
+
+def test_same_content_is_stored_once(tmp_path, monkeypatch):
+    cache = MediaCache(str(tmp_path))
+    client = Client('api_key', 'secret_key', media_cache=cache)
+    mock_media(monkeypatch, client, {PHOTO_URL: b'same', VIDEO_URL: b'same'})
+    paths = client.fetch_media([PHOTO_URL, VIDEO_URL])
+    assert paths[PHOTO_URL] == paths[VIDEO_URL]
+    assert cache.size == 4
+
+
+def test_lru_eviction(tmp_path):
+    cache = MediaCache(str(tmp_path), max_size=10)
+    first = cache.put('first', [b'aaaa'])
+    second = cache.put('second', [b'bbbb'])
+    os.utime(first, (0, 0))
+    os.utime(second, (1, 1))
+    assert cache.get('first') == first  # now the most recently used
+    cache.put('third', [b'cccc'])
+    assert cache.size == 8
+    assert cache.get('first') == first
+    assert cache.get('second') is None
+    assert cache.get('third')
+
+    reopened = MediaCache(str(tmp_path), max_size=10)
+    assert reopened.size == 8
+    reopened.clear()
+    assert reopened.size == 0
+    assert reopened.get('first') is None
+
+
+def test_batch_larger_than_cache_keeps_its_paths(tmp_path, monkeypatch):
+    cache = MediaCache(str(tmp_path), max_size=10)
+    client = Client('api_key', 'secret_key', media_cache=cache)
+    media = {PHOTO_URL: b'a' * 8, VIDEO_URL: b'b' * 8}
+    mock_media(monkeypatch, client, media)
+    paths = client.fetch_media([PHOTO_URL, VIDEO_URL], max_workers=1)
+    assert all(os.path.exists(path) for path in paths.values())
+    assert cache.size == 16
+
+    # outside of the batch the excess is evicted again
+    cache.put('third', [b'cccc'])
+    assert cache.size <= 10
+
+
+def test_default_directory_is_private(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    cache = MediaCache()
+    assert cache.directory.startswith(str(tmp_path))
+    assert os.stat(cache.directory).st_mode & 0o777 == 0o700
+
+    os.chmod(cache.directory, 0o755)
+    with pytest.raises(PermissionError):
+        MediaCache()
+
+
+def test_downloads_are_bounded(tmp_path, monkeypatch):
+    cache = MediaCache(str(tmp_path))
+    client = Client('api_key', 'secret_key', media_cache=cache)
+    timeouts = []
+
+    def get(url, **kwargs):
+        timeouts.append(kwargs['timeout'])
+        time.sleep(kwargs['timeout'])
+        raise ReadTimeout()
+
+    monkeypatch.setattr(client.session, 'get', get)
+    with pytest.raises(ReadTimeout):
+        client.fetch_media([PHOTO_URL], timeout=0.01)
+    with pytest.raises(DeadlineExceeded):
+        client.fetch_media([PHOTO_URL], deadline=Deadline(0.02))
+    assert timeouts[0] == 0.01
+    assert 0 < timeouts[1] <= 0.02
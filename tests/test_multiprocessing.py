@@ -0,0 +1,68 @@
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from mati import Client
+from mati.media import MediaCache
+from mati.resources import Identity
+
+
+def retrieve_with_default_client(identity_id: str) -> str:
+    return Identity.retrieve(identity_id).id
+
+
+def retrieve_with_client(client: Client, identity_id: str) -> str:
+    return client.identities.retrieve(identity_id, client=client).id
+
+
+def stub_client(url: str) -> Client:
+    client = Client('api_key', 'secret_key')
+    client.base_url = url  # type: ignore
+    return client
+
+
+def test_pickle_client(tmp_path, stub_server):
+    client = stub_client(stub_server.url)
+    client.media_cache = MediaCache(str(tmp_path))
+    client.get_valid_bearer_token()
+    copy = pickle.loads(pickle.dumps(client))
+    assert copy.basic_auth_creds == client.basic_auth_creds
+    assert copy.bearer_tokens == client.bearer_tokens
+    assert copy.session is not client.session
+    assert copy.media_cache.directory == client.media_cache.directory
+
+
+@pytest.mark.skipif(
+    'fork' not in multiprocessing.get_all_start_methods(),
+    reason='fork is not available',
+)
+def test_process_pool_after_fork(stub_server):
+    client = stub_client(stub_server.url)
+    assert retrieve_with_default_client('parent') == 'parent'
+    parent_port = stub_server.requests[-1][2]
+
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(2, mp_context=context) as executor:
+        ids = list(executor.map(retrieve_with_default_client, 'abcd'))
+    assert ids == list('abcd')
+    assert retrieve_with_client(client, 'parent') == 'parent'
+
+    oauth = [r for r in stub_server.requests if r[1] == '/oauth']
+    assert len(oauth) == 1  # children reused the parent's token
+    child_ports = {port for _, path, port in stub_server.requests[2:-1]}
+    assert parent_port not in child_ports  # but not its connections
+    assert stub_server.requests[-1][2] == parent_port
+
+
+def test_process_pool_with_pickled_client(stub_server):
+    client = stub_client(stub_server.url)
+    client.get_valid_bearer_token()
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(2, mp_context=context) as executor:
+        ids = list(
+            executor.map(retrieve_with_client, [client] * 3, ['x', 'y', 'z'])
+        )
+    assert ids == ['x', 'y', 'z']
+    assert [r[1] for r in stub_server.requests].count('/oauth') == 1
@@ -0,0 +1,142 @@
+import gc
+import multiprocessing
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Tuple
+
+import pytest
+
+from mati import Client
+from mati.resources import Resource
+from mati.token_pool import TokenPoolSettings
+
+
+def stub_client_class(stub_server) -> type:
+    # base_url has to be set before the pool starts fetching tokens
+    return type('StubClient', (Client,), dict(base_url=stub_server.url))
+
+
+def oauth_requests(stub_server) -> list:
+    return [r[1] for r in stub_server.requests if r[1].startswith('/oauth')]
+
+
+def test_pool_prewarms_all_scores(stub_server):
+    settings = TokenPoolSettings(scores=(None, 'identity'))
+    client = stub_client_class(stub_server)(
+        'api_key', 'secret_key', token_pool=settings
+    )
+    assert client.token_pool.wait_ready(5)
+    assert sorted(oauth_requests(stub_server)) == ['/oauth', '/oauth/token']
+    assert set(client.bearer_tokens) == {None, 'identity'}
+
+    client.identities.retrieve('1')
+    client.get('/v2/identities/2', token_score='identity')
+    assert len(oauth_requests(stub_server)) == 2  # no request waited on auth
+    client.token_pool.stop()
+
+
+def test_pool_refreshes_ahead_of_expiration(stub_server):
+    # tokens last 3600s - 30s of buffer, so this refreshes every ~50ms
+    settings = TokenPoolSettings(refresh_ahead=3569.95, retry_interval=0.05)
+    client = stub_client_class(stub_server)(
+        'api_key', 'secret_key', token_pool=settings
+    )
+    assert client.token_pool.wait_ready(5)
+    first = client.bearer_tokens[None]
+    time.sleep(0.3)
+    assert client.bearer_tokens[None] is not first
+    assert 3 <= len(oauth_requests(stub_server)) <= 8
+    client.token_pool.stop()
+
+
+def test_pool_is_ready_once_every_score_has_a_token(stub_server):
+    stub_server.failing_paths.add('/oauth/token')
+    settings = TokenPoolSettings(
+        scores=(None, 'identity'), retry_interval=0.05
+    )
+    client = stub_client_class(stub_server)(
+        'api_key', 'secret_key', token_pool=settings
+    )
+    assert not client.token_pool.wait_ready(0.3)
+    assert client.token_pool.pending == {'identity'}
+    assert set(client.bearer_tokens) == {None}
+
+    stub_server.failing_paths.clear()
+    assert client.token_pool.wait_ready(5)
+    assert not client.token_pool.pending
+    assert set(client.bearer_tokens) == {None, 'identity'}
+    client.token_pool.stop()
+
+
+def test_concurrent_renewals_share_one_request(stub_server):
+    client = stub_client_class(stub_server)('api_key', 'secret_key')
+    with ThreadPoolExecutor(4) as executor:
+        tokens = list(executor.map(client.get_valid_bearer_token, [None] * 4))
+    assert all(token is tokens[0] for token in tokens)
+    assert len(oauth_requests(stub_server)) == 1
+
+
+def pool_threads() -> int:
+    return sum(t.name == 'mati-token-pool' for t in threading.enumerate())
+
+
+def test_pool_stops_with_its_client(stub_server, monkeypatch):
+    # a module-level class, so clients can be pickled
+    monkeypatch.setattr(Client, 'base_url', stub_server.url)
+    client = Client('api_key', 'secret_key', token_pool=TokenPoolSettings())
+    assert client.token_pool.wait_ready(5)
+    before = pool_threads()
+    for _ in range(5):
+        copy = pickle.loads(pickle.dumps(client))
+        assert copy.token_pool.wait_ready(5)
+    del copy
+    gc.collect()
+    time.sleep(0.1)
+    assert pool_threads() == before
+    assert len(oauth_requests(stub_server)) == 1  # copies reused the token
+
+    client.close()
+    time.sleep(0.1)
+    assert pool_threads() == before - 1
+
+
+def test_copies_start_their_pool_when_a_token_is_needed(
+    stub_server, monkeypatch
+):
+    monkeypatch.setattr(Client, 'base_url', stub_server.url)
+    client = Client('api_key', 'secret_key', token_pool=TokenPoolSettings())
+    assert client.token_pool.wait_ready(5)
+    before = pool_threads()
+    copy = pickle.loads(pickle.dumps(client))
+    assert pool_threads() == before
+    copy.get_valid_bearer_token()
+    assert pool_threads() == before + 1
+    copy.close()
+    client.close()
+
+
+def pool_threads_in_child() -> Tuple[int, int]:
+    before = pool_threads()
+    Resource._client.get_valid_bearer_token()
+    return before, pool_threads()
+
+
+@pytest.mark.skipif(
+    'fork' not in multiprocessing.get_all_start_methods(),
+    reason='fork is not available',
+)
+def test_forked_children_start_their_pool_lazily(stub_server, monkeypatch):
+    monkeypatch.setattr(Client, 'base_url', stub_server.url)
+    client = Client('api_key', 'secret_key', token_pool=TokenPoolSettings())
+    assert client.token_pool.wait_ready(5)
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(1, mp_context=context) as executor:
+        assert executor.submit(pool_threads_in_child).result() == (0, 1)
+    client.close()
+
+
+def test_pool_needs_scores():
+    with pytest.raises(ValueError):
+        TokenPoolSettings(scores=())